@@ -15,12 +15,15 @@ import os
 import pathlib
 import sys
 import xml.etree.ElementTree as ET
+from decimal import ROUND_DOWN, Decimal
 
 
 def _write_summary(text: str) -> None:
     summary_path = os.environ.get("GITHUB_STEP_SUMMARY")
     if summary_path:
-        pathlib.Path(summary_path).write_text(text, encoding="utf-8")
+        # Append: earlier steps may already have written to the summary file.
+        with open(summary_path, "a", encoding="utf-8") as f:
+            f.write(text)
     else:
         print(text)
 
@@ -32,20 +35,26 @@ def main(argv: list[str]) -> int:
         _write_summary("## Coverage\n\n- No `tests/coverage.xml` found; skipping summary.\n")
         return 0
 
-    root = ET.parse(coverage_xml).getroot()
-    line_rate = float(root.attrib.get("line-rate", "0"))
-    percent = line_rate * 100
+    # Only the root element's `line-rate` is needed; stop at its start tag
+    # instead of building the whole tree.
+    ctx = ET.iterparse(coverage_xml, events=("start",))
+    _, root = next(ctx)
+    line_rate = Decimal(root.attrib.get("line-rate", "0"))
+    del ctx
+    # Decimal keeps the attribute's exact digits; truncate to two places like
+    # Codecov's default `round: down` so the two reports agree.
+    percent = (line_rate * 100).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
 
     repo = os.environ.get("GITHUB_REPOSITORY", "myrveln/lua-webhook")
     codecov_url = f"https://codecov.io/gh/{repo}"
 
     _write_summary(
         "## Coverage\n\n"
-        f"- Line coverage: **{percent:.2f}%**\n"
+        f"- Line coverage: **{percent}%**\n"
         f"- Codecov: {codecov_url}\n"
     )
 
-    print(f"Line coverage: {percent:.2f}%")
+    print(f"Line coverage: {percent}%")
     return 0
 
 
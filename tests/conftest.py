@@ -1,59 +1,233 @@
+import http.client
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from urllib.parse import urlsplit
 
+import orjson
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
 
 
-def _is_http_ready(url: str, *, timeout_s: float) -> bool:
+def _is_http_ready(conn: http.client.HTTPConnection, path: str) -> bool:
+    # Probe with bare http.client rather than requests: this runs in a tight
+    # loop during container boot and only needs a status line. A plain TCP
+    # connect isn't enough, since Docker's port proxy accepts connections
+    # before the container is listening.
     try:
-        # Any HTTP response means the server is listening.
-        requests.get(url, timeout=timeout_s)
+        # Any HTTP response means the server is listening; HEAD skips the body.
+        conn.request("HEAD", path)
+        conn.getresponse()
         return True
-    except requests.RequestException:  # pragma: no cover
+    except (OSError, http.client.HTTPException):  # pragma: no cover
         return False
+    finally:
+        conn.close()
 
 
-@pytest.fixture(scope="session", autouse=True)
-def wait_for_openresty() -> None:
-    """Wait until the OpenResty container is accepting connections.
+# Base URLs already confirmed ready in this process, so each service's probe
+# loop runs at most once per test session.
+_READY: set[str] = set()
 
-    Docker-compose `up -d` can return before the port is ready. This fixture
-    reduces flakiness in CI and local runs by waiting briefly.
 
-    We intentionally treat *any* HTTP response as ready, so this works for both
-    auth and no-auth modes.
+def _wait_ready(base_url: str) -> None:
+    """Block until `base_url` answers HTTP, or raise after the startup timeout.
+
+    `_stats` is commonly exempted from auth; but even if it isn't, any HTTP
+    status code means the service is alive.
     """
 
-    base_urls = []
-    for env_name, default in (
-        ("BASE_URL", "http://localhost:8080/webhook"),
-        ("BASE_URL_CONFIG", ""),
-    ):
-        v = (os.getenv(env_name) or default).strip()
-        if v:
-            base_urls.append(v.rstrip("/"))
-
-    # `_stats` is commonly exempted from auth; but even if it isn't, any HTTP
-    # status code means the service is alive.
-    probe_urls = []
-    for base_url in dict.fromkeys(base_urls):
-        probe_urls.extend([
-            f"{base_url}/_stats",
-            base_url,
-        ])
+    base_url = base_url.rstrip("/")
+    if base_url in _READY:
+        return
+
+    probe_urls = [
+        f"{base_url}/_stats",
+        base_url,
+    ]
+
+    parts = urlsplit(base_url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    probe_paths = [urlsplit(u).path or "/" for u in probe_urls]
 
     deadline = time.monotonic() + float(os.getenv("WEBHOOK_TEST_STARTUP_TIMEOUT_S", "20"))
-    sleep_s = 0.1
+    sleep_s = 0.025
 
     while time.monotonic() < deadline:
-        for probe_url in probe_urls:
-            if _is_http_ready(probe_url, timeout_s=0.5):
+        for path in probe_paths:
+            if _is_http_ready(conn_cls(parts.hostname, parts.port, timeout=0.5), path):
+                _READY.add(base_url)
                 return
 
         time.sleep(sleep_s)  # pragma: no cover
-        sleep_s = min(sleep_s * 1.5, 1.0)  # pragma: no cover
+        sleep_s = min(sleep_s * 1.3, 1.0)  # pragma: no cover
 
     raise RuntimeError(
         f"OpenResty did not become ready in time. Tried: {', '.join(probe_urls)}"
     )  # pragma: no cover
+
+
+def _skip_wait(request: pytest.FixtureRequest) -> bool:
+    """True when no selected test needs a live server.
+
+    Set `PYTEST_SKIP_WAIT=1` to force this, e.g. when running only the helper
+    unit tests without the Compose stack.
+    """
+
+    if os.getenv("PYTEST_SKIP_WAIT"):
+        return True
+    return not any("integration" in item.keywords for item in request.session.items)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def wait_for_openresty(request: pytest.FixtureRequest) -> None:
+    """Wait until the OpenResty container is accepting connections.
+
+    Docker-compose `up -d` can return before the port is ready. This fixture
+    reduces flakiness in CI and local runs by waiting briefly.
+
+    We intentionally treat *any* HTTP response as ready, so this works for both
+    auth and no-auth modes.
+    """
+
+    if _skip_wait(request):
+        return
+    _wait_ready(os.getenv("BASE_URL") or "http://localhost:8080/webhook")
+
+
+@pytest.fixture(scope="session")
+def wait_for_openresty_config(request: pytest.FixtureRequest) -> None:
+    """Wait until the config-enabled OpenResty container is accepting connections.
+
+    Not autouse: only `test_config.py` talks to this instance, and the opt-in
+    modes don't start it.
+    """
+
+    if _skip_wait(request):
+        return
+    _wait_ready(os.getenv("BASE_URL_CONFIG") or "http://localhost:8081/webhook")
+
+
+@pytest.fixture(scope="session")
+def session() -> Iterator[requests.Session]:
+    """Shared HTTP session without default headers.
+
+    Tests pass auth headers per request, so the same pool serves both
+    authenticated and unauthenticated calls.
+    """
+
+    s = requests.Session()
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    yield s
+    s.close()
+
+
+@pytest.fixture(scope="session")
+def api() -> Iterator[requests.Session]:
+    """HTTP session that authenticates every request with `WEBHOOK_TEST_API_KEY`.
+
+    The key lives in `Session.headers`, so tests don't rebuild an auth dict per
+    call; method-level `headers=` still merge on top for per-test overrides.
+    """
+
+    s = requests.Session()
+    api_key = os.getenv("WEBHOOK_TEST_API_KEY", "")
+    if api_key:
+        s.headers["X-API-Key"] = api_key
+    s.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=32))
+    yield s
+    s.close()
+
+
+@pytest.fixture(scope="session")
+def large_payload() -> bytes:
+    """~1 MB JSON array of 1000 records, serialized once per session.
+
+    Tests send it with `data=` so requests doesn't re-encode it per call.
+    """
+
+    items = [
+        {
+            "id": f"ID{i:016d}",
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "bio": "Lorem ipsum " * 50,
+            "data": {"field": i, "value": i * 2},
+        }
+        for i in range(1000)
+    ]
+    return orjson.dumps(items)
+
+
+# Categories `test_webhook.py` writes into. Only purged when
+# WEBHOOK_TEST_CLEANUP=1: BASE_URL may point at a shared deployment where names
+# like `orders` hold real data.
+_CLEANUP_CATEGORIES = (
+    "test", "test-list", "page", "payload", "cat-a", "batch-test", "batch-del",
+    "products", "search-page", "search-nopayload", "time-test", "orders",
+    "replays", "export-test", "export-cat", "large-test", "rebuild",
+)
+
+
+def _purge_category(s: requests.Session, base_url: str, category: str) -> None:
+    keys: list[str] = []
+    cursor = None
+    while True:
+        url = f"{base_url}/{category}?limit=1000&include_payload=false"
+        if cursor:
+            url += f"&cursor={cursor}"
+        resp = s.get(url, timeout=10)
+        if resp.status_code != 200:
+            raise RuntimeError(f"listing {category!r} returned {resp.status_code}: {resp.text}")
+        data = resp.json()
+        keys.extend(item["key"] for item in data.get("keys") or [])
+        cursor = data.get("next_cursor")
+        if not cursor:
+            break
+
+    if keys:
+        # One batch delete per category rather than a request per key.
+        resp = s.delete(f"{base_url}/{category}/_batch", json={"keys": keys}, timeout=10)
+        if resp.status_code != 200:
+            raise RuntimeError(f"batch delete in {category!r} returned {resp.status_code}: {resp.text}")
+
+
+def _purge_test_categories(config: pytest.Config) -> None:
+    base_url = (os.getenv("BASE_URL") or "http://localhost:8080/webhook").rstrip("/")
+    s = requests.Session()
+    api_key = os.getenv("WEBHOOK_TEST_API_KEY", "")
+    if api_key:
+        s.headers["X-API-Key"] = api_key
+
+    def _purge(category: str) -> str | None:
+        try:
+            _purge_category(s, base_url, category)
+        except (requests.RequestException, RuntimeError) as exc:
+            return f"cleanup of {category!r} failed: {exc}"
+        return None
+
+    # Categories are independent, so purge a few at a time.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        errors = [e for e in pool.map(_purge, _CLEANUP_CATEGORIES) if e]
+    s.close()
+
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    for msg in errors:
+        if reporter is not None:
+            reporter.write_line(msg, yellow=True)
+        else:
+            print(msg)
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """Empty the test categories once the whole run is over (opt-in).
+
+    A session fixture finalizer would run per xdist worker, while other workers
+    may still be using these categories; this hook is skipped on workers and
+    runs once on the controller (or in a serial run).
+    """
+
+    if not hasattr(session.config, "workerinput") and os.getenv("WEBHOOK_TEST_CLEANUP"):  # pragma: no cover
+        _purge_test_categories(session.config)
@@ -13,7 +13,6 @@ They validate:
 """
 
 import os
-import requests
 
 import pytest
 
@@ -22,8 +21,8 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:8080/webhook")
 API_KEY = os.getenv("WEBHOOK_TEST_API_KEY", "")
 
 
-def _headers_bearer(key: str) -> dict:
-    return {"Authorization": f"Bearer {key}"}
+_HDR_X_API_KEY = {"X-API-Key": API_KEY}
+_HDR_BEARER = {"Authorization": f"Bearer {API_KEY}"}
 
 
 def _headers_x_api_key(key: str) -> dict:
@@ -31,64 +30,65 @@ def _headers_x_api_key(key: str) -> dict:
 
 
 @pytest.mark.integration
+@pytest.mark.xdist_group(name="auth")
 class TestWebhookAuthentication:
-    def test_stats_endpoint_exempt(self):
+    def test_stats_endpoint_exempt(self, session):
         """If _stats is in WEBHOOK_AUTH_EXEMPT, it must work without a key."""
-        response = requests.get(f"{BASE_URL}/_stats")
+        response = session.get(f"{BASE_URL}/_stats")
         assert response.status_code == 200
 
-    def test_missing_api_key_is_401(self):
-        response = requests.get(BASE_URL)
+    def test_missing_api_key_is_401(self, session):
+        response = session.get(BASE_URL)
         assert response.status_code == 401
         data = response.json()
         assert data.get("error_code") == "AUTH_REQUIRED"
 
-    def test_invalid_api_key_is_403(self):
-        response = requests.get(BASE_URL, headers=_headers_x_api_key("definitely-wrong"))
+    def test_invalid_api_key_is_403(self, session):
+        response = session.get(BASE_URL, headers=_headers_x_api_key("definitely-wrong"))
         assert response.status_code == 403
         data = response.json()
         assert data.get("error_code") == "AUTH_INVALID"
 
-    def test_valid_api_key_allows_crud(self):
+    def test_valid_api_key_allows_crud(self, session):
         if not API_KEY:
             pytest.skip("WEBHOOK_TEST_API_KEY not set")  # pragma: no cover
 
-        headers = _headers_x_api_key(API_KEY)
+        headers = _HDR_X_API_KEY
 
         # Create
         payload = {"auth": "ok"}
-        create = requests.post(f"{BASE_URL}/auth", json=payload, headers=headers)
+        create = session.post(f"{BASE_URL}/auth", json=payload, headers=headers)
         assert create.status_code == 200
         key = create.json()["key"]
 
         # Retrieve
-        get_resp = requests.get(f"{BASE_URL}/auth/{key}", headers=_headers_bearer(API_KEY))
+        get_resp = session.get(f"{BASE_URL}/auth/{key}", headers=_HDR_BEARER)
         assert get_resp.status_code == 200
         assert get_resp.json()["value"]["auth"] == "ok"
 
         # Update TTL
-        patch = requests.patch(f"{BASE_URL}/auth/{key}", json={"ttl": 3600}, headers=headers)
+        patch = session.patch(f"{BASE_URL}/auth/{key}", json={"ttl": 3600}, headers=headers)
         assert patch.status_code == 200
         assert patch.json()["status"] == "updated"
 
         # Delete
-        delete = requests.delete(f"{BASE_URL}/auth/{key}", headers=headers)
+        delete = session.delete(f"{BASE_URL}/auth/{key}", headers=headers)
         assert delete.status_code == 200
         assert delete.json()["status"] == "deleted"
 
-    def test_metrics_requires_auth_and_exports_auth_counters(self):
+    def test_metrics_requires_auth_and_exports_auth_counters(self, session):
         if not API_KEY:
             pytest.skip("WEBHOOK_TEST_API_KEY not set")  # pragma: no cover
 
         # Generate a couple auth failures
-        requests.get(BASE_URL)
-        requests.get(BASE_URL, headers=_headers_x_api_key("definitely-wrong"))
+        session.get(BASE_URL)
+        session.get(BASE_URL, headers=_headers_x_api_key("definitely-wrong"))
 
         # Metrics endpoint should require auth (since we only exempt _stats in CI)
-        no_auth = requests.get(f"{BASE_URL}/_metrics")
+        no_auth = session.get(f"{BASE_URL}/_metrics")
         assert no_auth.status_code == 401
 
-        metrics = requests.get(f"{BASE_URL}/_metrics", headers=_headers_bearer(API_KEY))
+        metrics = session.get(f"{BASE_URL}/_metrics", headers=_HDR_BEARER)
         assert metrics.status_code == 200
         body = metrics.text
         assert "webhook_auth_missing_total" in body
@@ -10,14 +10,13 @@ These tests validate the Pub/Sub publishing behavior.
 
 from __future__ import annotations
 
-import json
 import os
 import time
-from typing import Dict
+from typing import Callable, Dict, Iterator
 
+import orjson
 import pytest
 import redis
-import requests
 
 
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8080/webhook")
@@ -27,13 +26,15 @@ REDIS_HOST = os.getenv("WEBHOOK_REDIS_HOST") or "127.0.0.1"
 REDIS_PORT = int(os.getenv("WEBHOOK_REDIS_PORT") or "6379")
 
 
+# `_auth_headers()` hands out this dict itself; that's safe because requests
+# copies headers per request.
+_AUTH_HEADERS: Dict[str, str] = {"X-API-Key": WEBHOOK_TEST_API_KEY} if WEBHOOK_TEST_API_KEY else {}
+
+
 def _auth_headers(headers: Dict[str, str] | None = None) -> Dict[str, str]:
-    merged: Dict[str, str] = {}
-    if WEBHOOK_TEST_API_KEY:
-        merged["X-API-Key"] = WEBHOOK_TEST_API_KEY
-    if headers:
-        merged.update(headers)
-    return merged
+    if not headers:
+        return _AUTH_HEADERS
+    return {**_AUTH_HEADERS, **headers}
 
 
 class _FakePubSub:
@@ -46,21 +47,36 @@ class _FakePubSub:
         return None
 
 
-def _wait_for_event(pubsub: redis.client.PubSub, timeout_s: float = 5.0) -> dict:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        msg = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-        if not msg:
-            continue
-        if msg.get("type") != "message":
-            continue
-        raw = msg.get("data")
-        if isinstance(raw, (bytes, bytearray)):
-            raw = raw.decode("utf-8", errors="replace")
-        try:
-            return json.loads(raw)
-        except Exception:
-            continue
+def _wait_for_event(
+    pubsub: redis.client.PubSub,
+    timeout_s: float = 5.0,
+    raw_filter: Callable[[bytes], bool] | None = None,
+) -> dict:
+    """Return the next decodable event.
+
+    `raw_filter`, if given, is applied to the raw frame first; frames it rejects
+    are skipped without being decoded.
+    """
+
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        # Drain whatever is already buffered without blocking, then back off
+        # briefly; a blocking get_message() can sit on the socket for its full
+        # timeout even when the next frame has already arrived.
+        while True:
+            msg = pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+            if msg is None:
+                break
+            if msg.get("type") != "message":
+                continue
+            raw = msg.get("data")
+            if raw_filter is not None and not raw_filter(raw):
+                continue
+            try:
+                return orjson.loads(raw)
+            except Exception:
+                continue
+        time.sleep(0.01)
     raise AssertionError(f"No event received within {timeout_s}s")
 
 
@@ -71,82 +87,97 @@ def _wait_for_subscribed(pubsub: redis.client.PubSub, channel: str, timeout_s: f
     miss the first message.
     """
 
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        msg = pubsub.get_message(ignore_subscribe_messages=False, timeout=1.0)
-        if not msg:
-            continue
-        if msg.get("type") == "subscribe":
-            subscribed_channel = msg.get("channel")
-            if isinstance(subscribed_channel, (bytes, bytearray)):
-                subscribed_channel = subscribed_channel.decode("utf-8", errors="replace")
-            if subscribed_channel == channel:
-                return
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        while True:
+            msg = pubsub.get_message(ignore_subscribe_messages=False, timeout=0)
+            if msg is None:
+                break
+            if msg.get("type") == "subscribe":
+                subscribed_channel = msg.get("channel")
+                if isinstance(subscribed_channel, (bytes, bytearray)):
+                    subscribed_channel = subscribed_channel.decode("utf-8", errors="replace")
+                if subscribed_channel == channel:
+                    return
+        time.sleep(0.01)
     raise AssertionError(f"Did not observe subscribe confirmation for {channel} within {timeout_s}s")
 
 
-@pytest.mark.integration
-class TestWebhookEventPublishing:
-    def test_create_publishes_event(self):
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
-        pubsub = r.pubsub()
-        pubsub.subscribe("webhook:events")
-        _wait_for_subscribed(pubsub, "webhook:events")
+def _drain(pubsub: redis.client.PubSub) -> None:
+    """Discard any buffered messages (e.g. events left over from earlier tests)."""
+
+    while pubsub.get_message(ignore_subscribe_messages=True, timeout=0) is not None:
+        pass
 
-        try:
-            payload = {"event_test": "created"}
-            resp = requests.post(
-                f"{BASE_URL}/events",
-                json=payload,
-                headers=_auth_headers({"X-Test-Header": "1"}),
-            )
-            assert resp.status_code == 200
-            key = resp.json()["key"]
-
-            event = _wait_for_event(pubsub)
-            assert event["type"] == "webhook.created"
-            assert event["data"]["category"] == "events"
-            assert event["data"]["key"] == key
-            assert "timestamp" in event
-        finally:
-            try:
-                pubsub.close()
-            except Exception:  # pragma: no cover
-                pass  # pragma: no cover
 
-    def test_delete_publishes_event(self):
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
-        pubsub = r.pubsub()
-        pubsub.subscribe("webhook:events")
-        _wait_for_subscribed(pubsub, "webhook:events")
+@pytest.fixture(scope="module")
+def events_pubsub() -> Iterator[redis.client.PubSub]:
+    """One subscription to `webhook:events` shared by every test in this module."""
 
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
+    pubsub = r.pubsub()
+    pubsub.subscribe("webhook:events")
+    _wait_for_subscribed(pubsub, "webhook:events")
+
+    try:
+        yield pubsub
+    finally:
         try:
-            # Create then delete
-            create = requests.post(
-                f"{BASE_URL}/events",
-                json={"event_test": "delete"},
-                headers=_auth_headers(),
+            pubsub.close()
+        except Exception:  # pragma: no cover
+            pass  # pragma: no cover
+
+
+@pytest.mark.integration
+@pytest.mark.xdist_group(name="events")
+class TestWebhookEventPublishing:
+    def test_create_publishes_event(self, session, events_pubsub):
+        _drain(events_pubsub)
+
+        payload = {"event_test": "created"}
+        resp = session.post(
+            f"{BASE_URL}/events",
+            json=payload,
+            headers=_auth_headers({"X-Test-Header": "1"}),
+        )
+        assert resp.status_code == 200
+        key = resp.json()["key"]
+
+        # Other workers may publish concurrently; skip frames for other keys.
+        event = _wait_for_event(events_pubsub, raw_filter=lambda b: key.encode("utf-8") in b)
+        assert event["type"] == "webhook.created"
+        assert event["data"]["category"] == "events"
+        assert event["data"]["key"] == key
+        assert "timestamp" in event
+
+    def test_delete_publishes_event(self, session, events_pubsub):
+        _drain(events_pubsub)
+
+        # Create then delete
+        create = session.post(
+            f"{BASE_URL}/events",
+            json={"event_test": "delete"},
+            headers=_AUTH_HEADERS,
+        )
+        assert create.status_code == 200
+        key = create.json()["key"]
+
+        delete = session.delete(f"{BASE_URL}/events/{key}", headers=_AUTH_HEADERS)
+        assert delete.status_code == 200
+
+        # There may be a created event first; consume until we see deleted.
+        deadline = time.monotonic() + 5.0
+        while True:
+            if time.monotonic() > deadline:
+                raise AssertionError("No webhook.deleted event received")  # pragma: no cover
+            event = _wait_for_event(
+                events_pubsub,
+                timeout_s=1.0,
+                raw_filter=lambda b: b'"webhook.deleted"' in b,
             )
-            assert create.status_code == 200
-            key = create.json()["key"]
-
-            delete = requests.delete(f"{BASE_URL}/events/{key}", headers=_auth_headers())
-            assert delete.status_code == 200
-
-            # There may be a created event first; consume until we see deleted.
-            deadline = time.time() + 5.0
-            while True:
-                if time.time() > deadline:
-                    raise AssertionError("No webhook.deleted event received")  # pragma: no cover
-                event = _wait_for_event(pubsub, timeout_s=1.0)
-                if event.get("type") == "webhook.deleted" and event.get("data", {}).get("key") == key:
-                    assert event["data"]["category"] == "events"
-                    break
-        finally:
-            try:
-                pubsub.close()
-            except Exception:  # pragma: no cover
-                pass  # pragma: no cover
+            if event.get("type") == "webhook.deleted" and event.get("data", {}).get("key") == key:
+                assert event["data"]["category"] == "events"
+                break
 
 
 def test__auth_headers_merges_dict() -> None:
@@ -166,6 +197,17 @@ def test__wait_for_event_skips_and_parses() -> None:
     assert event == {"ok": True}
 
 
+def test__wait_for_event_raw_filter_skips_frames() -> None:
+    pubsub = _FakePubSub(
+        [
+            {"type": "message", "data": b"{\"type\": \"webhook.created\"}"},
+            {"type": "message", "data": b"{\"type\": \"webhook.deleted\"}"},
+        ]
+    )
+    event = _wait_for_event(pubsub, timeout_s=0.1, raw_filter=lambda b: b"webhook.deleted" in b)
+    assert event == {"type": "webhook.deleted"}
+
+
 def test__wait_for_event_bad_json_then_raises() -> None:
     pubsub = _FakePubSub(
         [
@@ -5,13 +5,14 @@ Usage: pytest test_webhook.py -v
 """
 
 import pytest
-import requests
-import json
+import re
 import time
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterator
 import os
+import orjson
 import redis
 
+
 # Configuration
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8080/webhook")
 WEBHOOK_TEST_API_KEY = os.getenv("WEBHOOK_TEST_API_KEY", "")
@@ -19,139 +20,142 @@ WEBHOOK_TEST_API_KEY = os.getenv("WEBHOOK_TEST_API_KEY", "")
 REDIS_HOST = os.getenv("WEBHOOK_REDIS_HOST") or "127.0.0.1"
 REDIS_PORT = int(os.getenv("WEBHOOK_REDIS_PORT") or "6379")
 
-
-def _with_auth_headers(headers: Dict[str, str] | None = None) -> Dict[str, str]:
-    merged: Dict[str, str] = {}
-    if WEBHOOK_TEST_API_KEY:
-        merged["X-API-Key"] = WEBHOOK_TEST_API_KEY
-    if headers:
-        merged.update(headers)
-    return merged
-
-
-def http_get(url: str, **kwargs):
-    kwargs["headers"] = _with_auth_headers(kwargs.get("headers"))
-    return requests.get(url, **kwargs)
+# Every test here talks to the running service.
+pytestmark = pytest.mark.integration
 
 
-def http_post(url: str, **kwargs):
-    kwargs["headers"] = _with_auth_headers(kwargs.get("headers"))
-    return requests.post(url, **kwargs)
+# Small fixed bodies, serialized once; sent with `data=` so requests skips its
+# per-call json.dumps.
+_HDR_JSON = {"Content-Type": "application/json"}
+_BODY_DATA_TEST = b'{"data":"test"}'
+_BODY_TTL_7200 = b'{"ttl":7200}'
+_BODY_CALLBACK_NULL = b'{"callback_url":null}'
 
 
-def http_patch(url: str, **kwargs):
-    kwargs["headers"] = _with_auth_headers(kwargs.get("headers"))
-    return requests.patch(url, **kwargs)
+def _json(response) -> Any:
+    # Decode the raw body directly; skips requests' charset detection and the
+    # stdlib decoder on large responses.
+    return orjson.loads(response.content)
 
 
-def http_delete(url: str, **kwargs):
-    kwargs["headers"] = _with_auth_headers(kwargs.get("headers"))
-    return requests.delete(url, **kwargs)
+def _poll(
+    fetch: Callable[[], Any],
+    done: Callable[[Any], bool],
+    timeout_s: float = 2.0,
+    interval_s: float = 0.02,
+) -> Any:
+    """Call `fetch` until `done` accepts its result or `timeout_s` elapses.
 
+    Returns the last result either way, so the caller's asserts report the
+    actual failure instead of a generic timeout.
+    """
 
-def http_options(url: str, **kwargs):
-    kwargs["headers"] = _with_auth_headers(kwargs.get("headers"))
-    return requests.options(url, **kwargs)
+    deadline = time.monotonic() + timeout_s
+    while True:
+        result = fetch()
+        if done(result) or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval_s)
 
 
 class TestWebhookBasicOperations:
     """Test basic CRUD operations"""
 
-    def test_create_webhook_default_category(self):
+    def test_create_webhook_default_category(self, api):
         """Test creating a webhook in default category"""
         payload = {"test": "data", "value": 42}
-        response = http_post(BASE_URL, json=payload)
+        response = api.post(BASE_URL, json=payload)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["status"] == "stored"
         assert data["category"] == "default"
         assert "key" in data
         assert data["ttl"] == 259200  # 3 days
         assert data["callback_registered"] is False
 
-    def test_create_webhook_custom_category(self):
+    def test_create_webhook_custom_category(self, api):
         """Test creating webhook with custom category"""
         payload = {"order_id": 123, "amount": 99.99}
-        response = http_post(f"{BASE_URL}/orders", json=payload)
+        response = api.post(f"{BASE_URL}/orders", json=payload)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["category"] == "orders"
         assert "orders:" in data["key"]
 
-    def test_create_webhook_custom_ttl(self):
+    def test_create_webhook_custom_ttl(self, api):
         """Test creating webhook with custom TTL"""
         payload = {"data": "short-lived"}
-        response = http_post(f"{BASE_URL}/test?ttl=3600", json=payload)
+        response = api.post(f"{BASE_URL}/test?ttl=3600", json=payload)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["ttl"] == 3600
 
-    def test_create_with_callback(self):
+    def test_create_with_callback(self, api):
         """Test creating webhook with callback URL"""
-        payload = {"data": "test"}
         callback_url = "https://example.com/notify"
-        response = http_post(
+        response = api.post(
             f"{BASE_URL}/test?callback_url={callback_url}",
-            json=payload
+            data=_BODY_DATA_TEST,
+            headers=_HDR_JSON,
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         # Callback registration status may vary
         assert "callback_registered" in data
 
-    def test_retrieve_webhook(self):
+    def test_retrieve_webhook(self, api):
         """Test retrieving a webhook by key"""
         # Create webhook
         payload = {"test": "retrieval"}
-        create_response = http_post(f"{BASE_URL}/test", json=payload)
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/test", json=payload)
+        key = _json(create_response)["key"]
 
         # Retrieve webhook
-        response = http_get(f"{BASE_URL}/test/{key}")
+        response = api.get(f"{BASE_URL}/test/{key}")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["key"] == key
         assert data["value"]["test"] == "retrieval"
         assert "ttl" in data
 
-    def test_list_webhooks(self):
+    def test_list_webhooks(self, api):
         """Test listing all webhooks"""
-        response = http_get(BASE_URL)
+        response = api.get(BASE_URL)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         # API uses 'keys' instead of 'webhooks'
         assert "keys" in data
         assert "count" in data
         assert isinstance(data["keys"], list)
 
-    def test_list_category_webhooks(self):
+    def test_list_category_webhooks(self, api):
         """Test listing webhooks in specific category"""
         # Create webhook in test category
-        http_post(f"{BASE_URL}/test-list", json={"data": "test"})
+        api.post(f"{BASE_URL}/test-list", data=_BODY_DATA_TEST, headers=_HDR_JSON)
 
-        response = http_get(f"{BASE_URL}/test-list")
+        response = api.get(f"{BASE_URL}/test-list")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert "keys" in data
 
-    def test_list_pagination_and_cursor(self):
+    def test_list_pagination_and_cursor(self, api):
         """Listing supports limit+cursor pagination."""
 
-        # Create a handful of webhooks in one category.
-        for i in range(5):
-            r = http_post(f"{BASE_URL}/page", json={"n": i})
-            assert r.status_code == 200
+        # Create a handful of webhooks in one category, in one round trip.
+        r = api.post(f"{BASE_URL}/page/_batch", json={"items": [{"n": i} for i in range(5)]})
+        assert r.status_code == 200
+        assert _json(r)["total_created"] == 5
 
-        first = http_get(f"{BASE_URL}/page?limit=2")
+        first = api.get(f"{BASE_URL}/page?limit=2")
         assert first.status_code == 200
-        d1 = first.json()
+        d1 = _json(first)
         assert d1["count"] == 2
         assert "next_cursor" in d1
 
@@ -162,53 +166,53 @@ class TestWebhookBasicOperations:
 
         keys1 = {item["key"] for item in d1["keys"]}
 
-        second = http_get(f"{BASE_URL}/page?limit=2&cursor={c1}")
+        second = api.get(f"{BASE_URL}/page?limit=2&cursor={c1}")
         assert second.status_code == 200
-        d2 = second.json()
+        d2 = _json(second)
         assert d2["count"] == 2
         keys2 = {item["key"] for item in d2["keys"]}
 
         assert keys1.isdisjoint(keys2)
 
-    def test_list_include_payload_false(self):
-        r = http_post(f"{BASE_URL}/payload", json={"hello": "world"})
+    def test_list_include_payload_false(self, api):
+        r = api.post(f"{BASE_URL}/payload", json={"hello": "world"})
         assert r.status_code == 200
 
-        resp = http_get(f"{BASE_URL}/payload?limit=1&include_payload=false")
+        resp = api.get(f"{BASE_URL}/payload?limit=1&include_payload=false")
         assert resp.status_code == 200
-        data = resp.json()
+        data = _json(resp)
         assert data["count"] == 1
         first = data["keys"][0]
         assert "payload" not in first
 
-    def test_delete_webhook(self):
+    def test_delete_webhook(self, api):
         """Test deleting a webhook"""
         # Create webhook
-        create_response = http_post(f"{BASE_URL}/test", json={"data": "delete-me"})
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/test", json={"data": "delete-me"})
+        key = _json(create_response)["key"]
 
         # Delete webhook
-        response = http_delete(f"{BASE_URL}/test/{key}")
+        response = api.delete(f"{BASE_URL}/test/{key}")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["status"] == "deleted"
 
         # Verify deletion
-        get_response = http_get(f"{BASE_URL}/test/{key}")
+        get_response = api.get(f"{BASE_URL}/test/{key}")
         assert get_response.status_code == 404
 
-    def test_update_webhook_ttl(self):
+    def test_update_webhook_ttl(self, api):
         """Test updating webhook TTL via PATCH"""
         # Create webhook
-        create_response = http_post(f"{BASE_URL}/test", json={"data": "patch-test"})
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/test", json={"data": "patch-test"})
+        key = _json(create_response)["key"]
 
         # Update TTL
-        response = http_patch(f"{BASE_URL}/test/{key}", json={"ttl": 7200})
+        response = api.patch(f"{BASE_URL}/test/{key}", data=_BODY_TTL_7200, headers=_HDR_JSON)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["status"] == "updated"
         assert data["ttl"] == 7200
 
@@ -216,87 +220,172 @@ class TestWebhookBasicOperations:
 class TestWebhookErrors:
     """Test error handling"""
 
-    def test_missing_body(self):
+    def test_missing_body(self, api):
         """Test POST without body returns error"""
-        response = http_post(BASE_URL)
+        response = api.post(BASE_URL)
 
         assert response.status_code == 400
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "NO_BODY"
 
-    def test_invalid_json(self):
+    def test_invalid_json(self, api):
         """Test invalid JSON returns error"""
-        response = http_post(
+        response = api.post(
             BASE_URL,
             data="{invalid json",
-            headers={"Content-Type": "application/json"}
+            headers=_HDR_JSON
         )
 
         assert response.status_code == 400
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "INVALID_JSON"
 
-    def test_key_not_found(self):
+    def test_key_not_found(self, api):
         """Test retrieving non-existent key"""
         # Key must match category prefix under stricter validation.
-        response = http_get(f"{BASE_URL}/test/test:0:nonexistent")
+        response = api.get(f"{BASE_URL}/test/test:0:nonexistent")
 
         assert response.status_code == 404
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "KEY_NOT_FOUND"
 
-    def test_key_category_mismatch_is_400(self):
-        create = http_post(f"{BASE_URL}/cat-a", json={"x": 1})
+    def test_key_category_mismatch_is_400(self, api):
+        create = api.post(f"{BASE_URL}/cat-a", json={"x": 1})
         assert create.status_code == 200
-        key = create.json()["key"]
+        key = _json(create)["key"]
 
         # Same key, wrong category path.
-        resp = http_get(f"{BASE_URL}/cat-b/{key}")
+        resp = api.get(f"{BASE_URL}/cat-b/{key}")
         assert resp.status_code == 400
-        data = resp.json()
+        data = _json(resp)
         assert data.get("error_code") == "KEY_CATEGORY_MISMATCH"
 
-    def test_reserved_category_is_rejected(self):
-        resp = http_post(f"{BASE_URL}/_reserved", json={"x": 1})
+    def test_reserved_category_is_rejected(self, api):
+        resp = api.post(f"{BASE_URL}/_reserved", json={"x": 1})
         assert resp.status_code == 400
-        data = resp.json()
+        data = _json(resp)
         assert data.get("error_code") == "INVALID_CATEGORY"
 
-    def test_invalid_key_format_is_400(self):
+    def test_invalid_key_format_is_400(self, api):
         # Whitespace/control characters are rejected.
-        resp = http_get(f"{BASE_URL}/test/test:0:bad%20key")
+        resp = api.get(f"{BASE_URL}/test/test:0:bad%20key")
         assert resp.status_code == 400
-        data = resp.json()
+        data = _json(resp)
         assert data.get("error_code") == "INVALID_KEY"
 
 
 class TestWebhookCorsAndOptions:
-    def test_options_preflight(self):
-        resp = http_options(BASE_URL)
+    def test_options_preflight(self, api):
+        resp = api.options(BASE_URL)
         assert resp.status_code == 204
 
-    def test_delete_nonexistent_key(self):
+    def test_delete_nonexistent_key(self, api):
         """Test deleting non-existent key"""
         # Key must match category prefix under stricter validation.
-        response = http_delete(f"{BASE_URL}/test/test:0:nonexistent")
+        response = api.delete(f"{BASE_URL}/test/test:0:nonexistent")
 
         assert response.status_code == 404
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "KEY_NOT_FOUND"
 
-    def test_search_without_query(self):
+    def test_search_without_query(self, api):
         """Test search without query parameter"""
-        response = http_get(f"{BASE_URL}/_search")
+        response = api.get(f"{BASE_URL}/_search")
 
         assert response.status_code == 400
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "MISSING_QUERY"
 
 
+# Webhooks that read-only tests only need to exist, keyed by category.
+_SEED_ITEMS: Dict[str, list] = {
+    "products": [{"product": "laptop", "brand": "Apple", "price": 999}],
+    "export-test": [{"item": i} for i in range(3)],
+}
+
+
+# How each seed category's readers find it: the request they make and the
+# minimum `count` they rely on.
+_SEED_PROBES: Dict[str, tuple[str, int]] = {
+    "products": ("_search?q=laptop", 1),
+    "export-test": ("export-test?limit=3&include_payload=false", 3),
+}
+
+
+def _ensure_seeded(api) -> None:
+    """Batch-create each `_SEED_ITEMS` category its probe comes up short on."""
+
+    for category, (path, minimum) in _SEED_PROBES.items():
+        resp = api.get(f"{BASE_URL}/{path}")
+        assert resp.status_code == 200, resp.text
+        if _json(resp)["count"] < minimum:
+            create = api.post(f"{BASE_URL}/{category}/_batch", json={"items": _SEED_ITEMS[category]})
+            assert create.status_code == 200, create.text
+
+
+def test__ensure_seeded_creates_only_short_categories() -> None:
+    class _Resp:
+        status_code = 200
+        text = ""
+
+        def __init__(self, count):
+            self.content = orjson.dumps({"count": count})
+
+    class _Api:
+        def __init__(self):
+            self.posts: list[tuple] = []
+
+        def get(self, url, **kwargs):
+            # Search finds nothing; the listing already has all three items.
+            return _Resp(0 if "_search" in url else 3)
+
+        def post(self, url, **kwargs):
+            self.posts.append((url, kwargs["json"]))
+            return _Resp(1)
+
+    api = _Api()
+    _ensure_seeded(api)
+    assert api.posts == [(f"{BASE_URL}/products/_batch", {"items": _SEED_ITEMS["products"]})]
+
+
+@pytest.fixture(scope="session")
+def preseeded(api) -> bool:
+    """Whether `_SEED_ITEMS` are already stored, so tests can skip creating them.
+
+    Opt-in via WEBHOOK_CACHE_TEST_STATE=1 for local iteration against a
+    long-lived stack: seed categories the tests would not find (per
+    `_SEED_PROBES`) are created once and reused by later runs. Leave it unset
+    on CI, where every run starts from an empty Valkey. To invalidate the
+    cache, run once with WEBHOOK_TEST_CLEANUP=1, which purges these categories.
+    """
+
+    if os.getenv("WEBHOOK_CACHE_TEST_STATE"):
+        _ensure_seeded(api)
+        return True
+    return False
+
+
+@pytest.fixture
+def seeded_batch(api) -> Iterator[list[str]]:
+    """Keys of three webhooks batch-created in `batch-del`.
+
+    Whatever the test leaves behind is batch-deleted afterwards.
+    """
+
+    create = api.post(
+        f"{BASE_URL}/batch-del/_batch",
+        json={"items": [{"data": f"item{i}"} for i in range(3)]},
+    )
+    assert create.status_code == 200
+    keys = [item["key"] for item in _json(create)["success"]]
+    yield keys
+    api.delete(f"{BASE_URL}/batch-del/_batch", json={"keys": keys})
+
+
 class TestWebhookBatchOperations:
     """Test batch create and delete operations"""
 
-    def test_batch_create(self):
+    def test_batch_create(self, api):
         """Test batch creating multiple webhooks"""
         payload = {
             "items": [
@@ -306,195 +395,197 @@ class TestWebhookBatchOperations:
             ]
         }
 
-        response = http_post(f"{BASE_URL}/batch-test/_batch", json=payload)
+        response = api.post(f"{BASE_URL}/batch-test/_batch", json=payload)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["total_created"] == 3
         assert len(data["success"]) == 3
         assert data["total_failed"] == 0
 
-    def test_batch_delete(self):
+    def test_batch_delete(self, api, seeded_batch):
         """Test batch deleting multiple webhooks"""
-        # Create webhooks
-        create_payload = {
-            "items": [
-                {"data": f"item{i}"} for i in range(3)
-            ]
-        }
-        create_response = http_post(f"{BASE_URL}/batch-del/_batch", json=create_payload)
-        keys = [item["key"] for item in create_response.json()["success"]]
-
         # Batch delete
-        delete_payload = {"keys": keys}
-        response = http_delete(f"{BASE_URL}/batch-del/_batch", json=delete_payload)
+        delete_payload = {"keys": seeded_batch}
+        response = api.delete(f"{BASE_URL}/batch-del/_batch", json=delete_payload)
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["total_deleted"] == 3
 
-    def test_batch_invalid_format(self):
+    def test_batch_invalid_format(self, api):
         """Test batch with invalid format"""
-        response = http_post(f"{BASE_URL}/test/_batch", json={"invalid": "format"})
+        response = api.post(f"{BASE_URL}/test/_batch", json={"invalid": "format"})
 
         assert response.status_code == 400
-        data = response.json()
+        data = _json(response)
         assert data["error_code"] == "INVALID_BATCH_FORMAT"
 
 
 class TestWebhookAdvancedFeatures:
     """Test advanced features"""
 
-    def test_search(self):
+    def test_search(self, api, preseeded):
         """Test full-text search"""
         # Create searchable webhook
-        payload = {"product": "laptop", "brand": "Apple", "price": 999}
-        http_post(f"{BASE_URL}/products", json=payload)
+        if not preseeded:
+            api.post(f"{BASE_URL}/products/_batch", json={"items": _SEED_ITEMS["products"]})
 
-        time.sleep(0.5)  # Brief delay for indexing
-
-        # Search
-        response = http_get(f"{BASE_URL}/_search?q=laptop")
+        # Search, re-polling briefly in case indexing lags the create.
+        response = _poll(
+            lambda: api.get(f"{BASE_URL}/_search?q=laptop"),
+            lambda r: r.status_code == 200 and _json(r)["count"] >= 1,
+        )
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["count"] >= 1
         assert any("laptop" in str(r).lower() for r in data["results"])
 
-    def test_search_pagination_cursor(self):
+    def test_search_pagination_cursor(self, api):
         # Create a couple of matching webhooks.
-        for i in range(3):
-            http_post(f"{BASE_URL}/search-page", json={"tag": "cursor-search", "i": i})
+        api.post(
+            f"{BASE_URL}/search-page/_batch",
+            json={"items": [{"tag": "cursor-search", "i": i} for i in range(3)]},
+        )
 
-        first = http_get(f"{BASE_URL}/_search?q=cursor-search&limit=1")
+        first = api.get(f"{BASE_URL}/_search?q=cursor-search&limit=1")
         assert first.status_code == 200
-        d1 = first.json()
+        d1 = _json(first)
         assert d1["count"] == 1
         c1 = d1.get("next_cursor")
         assert c1 is not None
 
         key1 = d1["results"][0]["key"]
 
-        second = http_get(f"{BASE_URL}/_search?q=cursor-search&limit=1&cursor={c1}")
+        second = api.get(f"{BASE_URL}/_search?q=cursor-search&limit=1&cursor={c1}")
         assert second.status_code == 200
-        d2 = second.json()
+        d2 = _json(second)
         assert d2["count"] == 1
         key2 = d2["results"][0]["key"]
         assert key1 != key2
 
-    def test_search_include_payload_false(self):
-        http_post(f"{BASE_URL}/search-nopayload", json={"tag": "no-payload", "x": 1})
-        resp = http_get(f"{BASE_URL}/_search?q=no-payload&limit=5&include_payload=false")
+    def test_search_include_payload_false(self, api):
+        api.post(f"{BASE_URL}/search-nopayload", json={"tag": "no-payload", "x": 1})
+        resp = api.get(f"{BASE_URL}/_search?q=no-payload&limit=5&include_payload=false")
         assert resp.status_code == 200
-        data = resp.json()
+        data = _json(resp)
         assert data["count"] >= 1
         assert "payload" not in data["results"][0]
 
-    def test_statistics(self):
+    def test_statistics(self, api):
         """Test statistics endpoint"""
-        response = http_get(f"{BASE_URL}/_stats")
+        response = api.get(f"{BASE_URL}/_stats")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert "total_webhooks" in data
         assert "total_size_bytes" in data
         assert "storage_limit_bytes" in data
         assert "categories" in data
         assert isinstance(data["categories"], dict)
 
-    def test_timestamp_filtering(self):
+    def test_timestamp_filtering(self, api):
         """Test filtering by timestamp"""
-        # Create webhooks with delay
-        http_post(f"{BASE_URL}/time-test", json={"seq": 1})
-        time.sleep(1)
-        timestamp = int(time.time())
-        time.sleep(1)
-        http_post(f"{BASE_URL}/time-test", json={"seq": 2})
-
-        # Filter by timestamp
-        response = http_get(f"{BASE_URL}/time-test?since={timestamp}")
-
-        assert response.status_code == 200
-        data = response.json()
-        # Should only get webhooks created after timestamp
-
-    def test_callback_management(self):
+        create = api.post(f"{BASE_URL}/time-test", json={"seq": 1})
+        assert create.status_code == 200
+        key = _json(create)["key"]
+        # Keys embed their creation second (`<category>:<ts>:...`), which is
+        # what `since` compares against; no need to sleep across a boundary.
+        timestamp = int(key.split(":")[1])
+
+        # Filter at the creation second: the webhook is included.
+        at = api.get(f"{BASE_URL}/time-test?since={timestamp}")
+        assert at.status_code == 200
+        at_keys = [item["key"] for item in _json(at)["keys"]]
+        assert key in at_keys
+        assert all(int(k.split(":")[1]) >= timestamp for k in at_keys)
+
+        # One second later: the same webhook must be filtered out.
+        after = api.get(f"{BASE_URL}/time-test?since={timestamp + 1}")
+        assert after.status_code == 200
+        after_keys = [item["key"] for item in _json(after)["keys"]]
+        assert key not in after_keys
+        assert all(int(k.split(":")[1]) > timestamp for k in after_keys)
+
+    def test_callback_management(self, api):
         """Test callback URL management"""
         # Create webhook
-        create_response = http_post(f"{BASE_URL}/test", json={"data": "callback-test"})
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/test", json={"data": "callback-test"})
+        key = _json(create_response)["key"]
 
         # Add callback
         callback_url = "https://example.com/notify"
-        response = http_patch(
+        response = api.patch(
             f"{BASE_URL}/test/{key}",
             json={"callback_url": callback_url}
         )
 
         assert response.status_code == 200
-        assert response.json()["changes"]["callback_url"] == callback_url
+        assert _json(response)["changes"]["callback_url"] == callback_url
 
         # Remove callback
-        remove_response = http_patch(
+        remove_response = api.patch(
             f"{BASE_URL}/test/{key}",
-            json={"callback_url": None}
+            data=_BODY_CALLBACK_NULL,
+            headers=_HDR_JSON,
         )
 
         assert remove_response.status_code == 200
 
-    def test_callback_url_validation_blocks_localhost(self):
+    def test_callback_url_validation_blocks_localhost(self, api):
         # Create webhook
-        create_response = http_post(f"{BASE_URL}/test", json={"data": "cb-validate"})
+        create_response = api.post(f"{BASE_URL}/test", json={"data": "cb-validate"})
         assert create_response.status_code == 200
-        key = create_response.json()["key"]
+        key = _json(create_response)["key"]
 
         # Attempt to set a localhost callback (blocked by default).
-        resp = http_patch(
+        resp = api.patch(
             f"{BASE_URL}/test/{key}",
             json={"callback_url": "https://localhost/notify"},
         )
         assert resp.status_code == 400
-        assert resp.json().get("error_code") == "INVALID_CALLBACK_URL"
+        assert _json(resp).get("error_code") == "INVALID_CALLBACK_URL"
 
-    def test_callback_url_validation_blocks_http_scheme(self):
+    def test_callback_url_validation_blocks_http_scheme(self, api):
         # Create webhook with callback_url in query string (http is blocked by default).
-        resp = http_post(
+        resp = api.post(
             f"{BASE_URL}/test?callback_url=http://example.com/notify",
             json={"data": "cb-http"},
         )
         assert resp.status_code == 400
-        assert resp.json().get("error_code") == "INVALID_CALLBACK_URL"
+        assert _json(resp).get("error_code") == "INVALID_CALLBACK_URL"
 
-    def test_webhook_replay(self):
+    def test_webhook_replay(self, api):
         """Test webhook replay functionality"""
         # Create original webhook
         payload = {"order_id": 12345, "customer": "John Doe"}
-        create_response = http_post(f"{BASE_URL}/orders", json=payload)
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/orders", json=payload)
+        key = _json(create_response)["key"]
 
         # Replay webhook
-        response = http_post(f"{BASE_URL}/orders/{key}/_replay")
+        response = api.post(f"{BASE_URL}/orders/{key}/_replay")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["status"] == "replayed"
         assert data["original_key"] == key
         assert "new_key" in data
         assert data["new_key"] != key
 
-    def test_replay_to_different_category(self):
+    def test_replay_to_different_category(self, api):
         """Test replaying to different category with custom TTL"""
         # Create original
-        create_response = http_post(f"{BASE_URL}/test", json={"data": "replay-test"})
-        key = create_response.json()["key"]
+        create_response = api.post(f"{BASE_URL}/test", json={"data": "replay-test"})
+        key = _json(create_response)["key"]
 
         # Replay to different category with custom TTL via query params
-        response = http_post(
+        response = api.post(
             f"{BASE_URL}/test/{key}/_replay?category=replays&ttl=7200"
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["category"] == "replays"
         assert data["ttl"] == 7200
         assert "new_key" in data
@@ -503,41 +594,61 @@ class TestWebhookAdvancedFeatures:
 class TestWebhookExportImport:
     """Test export and import functionality"""
 
-    def test_export_all_webhooks(self):
+    def test_export_all_webhooks(self, api, preseeded):
         """Test exporting all webhooks"""
         # Create test webhooks
-        for i in range(3):
-            http_post(f"{BASE_URL}/export-test", json={"item": i})
+        if not preseeded:
+            api.post(f"{BASE_URL}/export-test/_batch", json={"items": _SEED_ITEMS["export-test"]})
 
         # Export
-        response = http_get(f"{BASE_URL}/_export")
+        response = api.get(f"{BASE_URL}/_export")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert "version" in data
         assert "exported_at" in data
         assert "webhooks" in data
 
-    def test_export_category(self):
+    def test_export_category(self, api):
         """Test exporting specific category"""
         # Create webhooks in category
-        http_post(f"{BASE_URL}/export-cat", json={"data": "test"})
+        api.post(f"{BASE_URL}/export-cat", data=_BODY_DATA_TEST, headers=_HDR_JSON)
 
         # Export category
-        response = http_get(f"{BASE_URL}/export-cat/_export")
+        response = api.get(f"{BASE_URL}/export-cat/_export")
 
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["category"] == "export-cat"
         assert "total_exported" in data
 
 
+_EXPECTED_METRICS_TOKENS = frozenset({
+    "webhook_requests_total",
+    "webhook_created_total",
+    "webhook_deleted_total",
+    "webhook_storage_bytes",
+    "webhook_count",
+    "webhook_responses_total",
+    "webhook_bytes_in_total",
+    "webhook_bytes_out_total",
+    "webhook_rate_limited_total",
+    "webhook_request_latency_ms_bucket",
+    "# HELP",
+    "# TYPE",
+})
+# Longest alternatives first, so no token shadows one it is a prefix of.
+_METRICS_RE = re.compile("|".join(
+    re.escape(t) for t in sorted(_EXPECTED_METRICS_TOKENS, key=len, reverse=True)
+))
+
+
 class TestWebhookMetrics:
     """Test Prometheus metrics"""
 
-    def test_metrics_endpoint(self):
+    def test_metrics_endpoint(self, api):
         """Test Prometheus metrics endpoint"""
-        response = http_get(f"{BASE_URL}/_metrics")
+        response = api.get(f"{BASE_URL}/_metrics")
 
         assert response.status_code == 200
         # Check proper Prometheus content type
@@ -546,62 +657,47 @@ class TestWebhookMetrics:
 
         metrics = response.text
 
-        # Check for expected metrics
-        assert "webhook_requests_total" in metrics
-        assert "webhook_created_total" in metrics
-        assert "webhook_deleted_total" in metrics
-        assert "webhook_storage_bytes" in metrics
-        assert "webhook_count" in metrics
-        assert "webhook_responses_total" in metrics
-        assert "webhook_bytes_in_total" in metrics
-        assert "webhook_bytes_out_total" in metrics
-        assert "webhook_rate_limited_total" in metrics
-        assert "webhook_request_latency_ms_bucket" in metrics
-
-        # Check Prometheus format
-        assert "# HELP" in metrics
-        assert "# TYPE" in metrics
+        # Check for expected metrics and Prometheus format in one pass
+        found = set(_METRICS_RE.findall(metrics))
+        missing = _EXPECTED_METRICS_TOKENS - found
+        assert not missing, f"missing from /_metrics: {sorted(missing)}"
 
 
 class TestWebhookLargePayloads:
     """Test handling of large payloads"""
 
-    def test_large_json_payload(self):
+    def test_large_json_payload(self, api, large_payload):
         """Test storing and retrieving 1MB JSON payload"""
-        # Create large payload
-        large_payload = [
-            {
-                "id": f"ID{i:016d}",
-                "name": f"User {i}",
-                "email": f"user{i}@example.com",
-                "bio": "Lorem ipsum " * 50,
-                "data": {"field": i, "value": i * 2}
-            }
-            for i in range(1000)
-        ]
-
         # Store
-        create_response = http_post(f"{BASE_URL}/large-test", json=large_payload)
+        create_response = api.post(
+            f"{BASE_URL}/large-test",
+            data=large_payload,
+            headers=_HDR_JSON,
+        )
         assert create_response.status_code == 200
-        key = create_response.json()["key"]
+        key = _json(create_response)["key"]
 
         # Retrieve
-        get_response = http_get(f"{BASE_URL}/large-test/{key}")
+        get_response = api.get(f"{BASE_URL}/large-test/{key}")
         assert get_response.status_code == 200
 
-        retrieved = get_response.json()["value"]
+        retrieved = _json(get_response)["value"]
         # Should have at least the 1000 items we created
         assert len(retrieved) >= 1000
         # Check first item structure
         assert "ID" in retrieved[0]["id"]
 
 
+@pytest.mark.skipif(
+    bool(os.getenv("PYTEST_XDIST_WORKER")),
+    reason="deletes the shared indexes, which creates on other workers race; run without -n",
+)
 class TestWebhookIndexRebuild:
-    def test_index_rebuild_recovers_listing(self):
+    def test_index_rebuild_recovers_listing(self, api):
         # Create one webhook so there's something to rebuild.
-        create = http_post(f"{BASE_URL}/rebuild", json={"ok": True})
+        create = api.post(f"{BASE_URL}/rebuild", json={"ok": True})
         assert create.status_code == 200
-        created_key = create.json()["key"]
+        created_key = _json(create)["key"]
 
         # Delete index keys to force a rebuild on the next request.
         r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
@@ -619,27 +715,86 @@ class TestWebhookIndexRebuild:
         )
 
         # Listing should still work (service will rebuild indexes lazily).
-        resp = http_get(f"{BASE_URL}/rebuild?limit=10")
+        resp = api.get(f"{BASE_URL}/rebuild?limit=10")
         assert resp.status_code == 200
-        data = resp.json()
+        data = _json(resp)
         keys = [item["key"] for item in data.get("keys", [])]
         assert created_key in keys
 
 
-@pytest.fixture(scope="session", autouse=True)
-def cleanup(request):
-    """Cleanup test data after all tests complete"""
-    def finalizer():
-        # Optional: Clean up test categories
-        test_categories = [
-            "test", "test-list", "batch-test", "batch-del",
-            "products", "time-test", "orders", "replays",
-            "export-test", "export-cat", "large-test"
-        ]
-        # Note: Implement cleanup if needed
-        pass
-
-    request.addfinalizer(finalizer)
+def test__purge_category_pages_then_batch_deletes() -> None:
+    from conftest import _purge_category
+
+    class _Resp:
+        def __init__(self, status_code, body=None):
+            self.status_code = status_code
+            self.text = "boom"
+            self._body = body
+
+        def json(self):
+            return self._body
+
+    class _Session:
+        def __init__(self, delete_status):
+            self.gets: list[str] = []
+            self.deletes: list[tuple] = []
+            self._delete_status = delete_status
+
+        def get(self, url, **kwargs):
+            self.gets.append(url)
+            if "cursor=" not in url:
+                return _Resp(200, {"keys": [{"key": "k1"}, {"key": "k2"}], "next_cursor": "c2"})
+            return _Resp(200, {"keys": [{"key": "k3"}]})
+
+        def delete(self, url, **kwargs):
+            self.deletes.append((url, kwargs["json"]))
+            return _Resp(self._delete_status)
+
+    s = _Session(delete_status=200)
+    _purge_category(s, "http://svc/webhook", "test")
+    assert len(s.gets) == 2 and s.gets[1].endswith("&cursor=c2")
+    assert s.deletes == [("http://svc/webhook/test/_batch", {"keys": ["k1", "k2", "k3"]})]
+
+    with pytest.raises(RuntimeError, match="returned 500"):
+        _purge_category(_Session(delete_status=500), "http://svc/webhook", "test")
+
+
+def test__purge_test_categories_reports_failures(monkeypatch) -> None:
+    import conftest
+
+    class _Resp:
+        status_code = 503
+        text = "unavailable"
+
+    class _Session:
+        def __init__(self):
+            self.headers: Dict[str, str] = {}
+
+        def get(self, *args, **kwargs):
+            return _Resp()
+
+        def close(self):
+            pass
+
+    class _Reporter:
+        def __init__(self):
+            self.lines: list[str] = []
+
+        def write_line(self, msg, **kwargs):
+            self.lines.append(msg)
+
+    class _PluginManager:
+        def get_plugin(self, name):
+            return reporter
+
+    class _Config:
+        pluginmanager = _PluginManager()
+
+    reporter = _Reporter()
+    monkeypatch.setattr(conftest.requests, "Session", _Session)
+    conftest._purge_test_categories(_Config())
+    assert len(reporter.lines) == len(conftest._CLEANUP_CATEGORIES)
+    assert all("returned 503" in line for line in reporter.lines)
 
 
 if __name__ == "__main__":  # pragma: no cover
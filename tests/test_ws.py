@@ -13,13 +13,14 @@ No pytest-asyncio plugin is required; tests use asyncio.run().
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import os
-from typing import Dict
+from typing import Callable, Dict
 from urllib.parse import urlparse
 
+import aiohttp
+import orjson
 import pytest
-import requests
 import websockets
 
 
@@ -27,15 +28,16 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:8080/webhook")
 WEBHOOK_TEST_API_KEY = os.getenv("WEBHOOK_TEST_API_KEY", "")
 
 
+_AUTH_HEADERS: Dict[str, str] = {"X-API-Key": WEBHOOK_TEST_API_KEY} if WEBHOOK_TEST_API_KEY else {}
+
+
 def _auth_headers(headers: Dict[str, str] | None = None) -> Dict[str, str]:
-    merged: Dict[str, str] = {}
-    if WEBHOOK_TEST_API_KEY:
-        merged["X-API-Key"] = WEBHOOK_TEST_API_KEY
-    if headers:
-        merged.update(headers)
-    return merged
+    if not headers:
+        return _AUTH_HEADERS
+    return {**_AUTH_HEADERS, **headers}
 
 
+@functools.cache
 def _ws_url() -> str:
     parsed = urlparse(BASE_URL)
     ws_scheme = "wss" if parsed.scheme == "https" else "ws"
@@ -45,7 +47,28 @@ def _ws_url() -> str:
 
 async def _recv_json(ws: websockets.WebSocketClientProtocol, timeout_s: float = 5.0) -> dict:
     raw = await asyncio.wait_for(ws.recv(), timeout=timeout_s)
-    return json.loads(raw)
+    return orjson.loads(raw)
+
+
+async def _drain_until(
+    ws: websockets.WebSocketClientProtocol,
+    pred: Callable[[dict], bool],
+    raw_filter: Callable[[str | bytes], bool] | None = None,
+) -> dict:
+    """Return the first decoded frame `pred` accepts.
+
+    `raw_filter`, if given, is applied to the raw frame first; frames it rejects
+    are skipped without being decoded. Callers bound the whole wait with one
+    `asyncio.wait_for` rather than re-arming a timeout per frame.
+    """
+
+    async for raw in ws:
+        if raw_filter is not None and not raw_filter(raw):
+            continue
+        event = orjson.loads(raw)
+        if pred(event):
+            return event
+    raise AssertionError("WebSocket closed before a matching event arrived")
 
 
 async def _connect_ws_with_retry(
@@ -82,48 +105,36 @@ def test_websocket_receives_created_event() -> None:
             ready = await _recv_json(ws)
             assert ready.get("type") == "webhook.ws_ready"
 
-            def _create_noise() -> str:
-                resp = requests.post(
-                    f"{BASE_URL}/ws",
-                    json={"ws": "noise"},
-                    headers=http_headers,
-                    timeout=5,
-                )
-                assert resp.status_code == 200
-                return resp.json()["key"]
-
-            def _delete(key: str) -> None:
-                resp = requests.delete(f"{BASE_URL}/ws/{key}", headers=http_headers, timeout=5)
-                assert resp.status_code == 200
-
-            def _create() -> requests.Response:
-                return requests.post(
-                    f"{BASE_URL}/ws",
-                    json={"ws": "created"},
-                    headers=http_headers,
-                    timeout=5,
-                )
+            # Issue the HTTP call from the coroutine itself rather than hopping
+            # to a thread.
+            async with aiohttp.ClientSession(
+                headers=http_headers,
+                connector=aiohttp.TCPConnector(limit=4),
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as http:
+                async with http.post(f"{BASE_URL}/ws", json={"ws": "created"}) as resp:
+                    assert resp.status == 200
+                    created_key = (await resp.json())["key"]
+
+            created_key_bytes = created_key.encode("utf-8")
 
-            loop = asyncio.get_running_loop()
-            noise_key: str = await loop.run_in_executor(None, _create_noise)
-            await loop.run_in_executor(None, _delete, noise_key)
-            resp: requests.Response = await loop.run_in_executor(None, _create)
-            assert resp.status_code == 200
-            created_key = resp.json()["key"]
-
-            deadline = loop.time() + 5.0
-            while True:
-                remaining = deadline - loop.time()
-                if remaining <= 0:
-                    raise AssertionError("Timed out waiting for webhook.created over WebSocket")  # pragma: no cover
-
-                event = await _recv_json(ws, timeout_s=min(remaining, 5.0))
-                if event.get("type") != "webhook.created":
-                    continue
-                if event.get("data", {}).get("key") != created_key:
-                    continue
-                assert event.get("data", {}).get("category") == "ws"
-                break
+            def _mentions_key(raw: str | bytes) -> bool:
+                return (created_key if isinstance(raw, str) else created_key_bytes) in raw
+
+            # Frames that don't mention our key are skipped undecoded; the
+            # filtering itself is covered by test__drain_until_filters_and_matches.
+            try:
+                event = await asyncio.wait_for(
+                    _drain_until(
+                        ws,
+                        lambda e: e.get("type") == "webhook.created" and e.get("data", {}).get("key") == created_key,
+                        raw_filter=_mentions_key,
+                    ),
+                    timeout=5.0,
+                )
+            except asyncio.TimeoutError:  # pragma: no cover
+                raise AssertionError("Timed out waiting for webhook.created over WebSocket") from None
+            assert event["data"].get("category") == "ws"
 
     asyncio.run(_run())
 
@@ -133,6 +144,36 @@ def test__auth_headers_merges_dict() -> None:
     assert hdrs.get("X-Extra") == "1"
 
 
+def test__drain_until_filters_and_matches() -> None:
+    class _FakeWS:
+        def __init__(self, frames: list[str]):
+            self._frames = iter(frames)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self) -> str:
+            try:
+                return next(self._frames)
+            except StopIteration:
+                raise StopAsyncIteration from None
+
+    frames = ["{not-json", '{"type": "webhook.deleted"}', '{"type": "webhook.created", "n": 1}']
+
+    async def _run() -> None:
+        event = await _drain_until(
+            _FakeWS(frames),
+            lambda e: e.get("n") == 1,
+            raw_filter=lambda raw: "webhook." in raw,
+        )
+        assert event == {"type": "webhook.created", "n": 1}
+
+        with pytest.raises(AssertionError):
+            await _drain_until(_FakeWS(frames[1:2]), lambda e: False)
+
+    asyncio.run(_run())
+
+
 def test__connect_ws_with_retry_falls_back_on_typeerror(monkeypatch) -> None:
     # Deliberately omit the `proxy` kwarg from this stub so the first call
     # (which passes `proxy=None`) raises a TypeError.